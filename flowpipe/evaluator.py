@@ -1,9 +1,11 @@
 """Classes to evaluate flowpipe Graphs in various ways."""
 
+import copy
+import hashlib
 import logging
-import time
+import pickle
 from concurrent import futures
-from multiprocessing import Manager, Process
+from multiprocessing import Pipe, Process, connection
 from pickle import PicklingError
 
 from .errors import FlowpipeMultiprocessingError
@@ -55,6 +57,24 @@ class Evaluator:
 class LinearEvaluator(Evaluator):
     """Evaluate the graph linearly in a single thread."""
 
+    def __init__(self, results=None, max_results=128):
+        """Initialize with an optional cache of evaluation results.
+
+        Args:
+            results (dict): Caches the outputs of evaluated nodes by the hash
+                of their inputs. Nodes with inputs that match a cached result
+                are not computed again. None disables the caching. Copies of
+                the outputs are cached and handed out, so that changing an
+                output value in place does not change the cached results.
+                Outputs that can not be copied are not cached.
+            max_results (int): The maximum number of results to keep in the
+                cache, the least recently used results are dropped first.
+                None keeps all results.
+
+        """
+        self.results = results
+        self.max_results = max_results
+
     def _evaluate_nodes(self, nodes):
         """Evaluate the graph linearly in a single thread.
 
@@ -63,7 +83,31 @@ class LinearEvaluator(Evaluator):
 
         """
         for node in nodes:
-            node.evaluate()
+            key = None
+            if self.results is not None and not node.omit:
+                key = _inputs_key(node)
+            if key is None:
+                node.evaluate()
+            elif key in self.results:
+                # Move the result to the end, the most recently used position
+                self.results[key] = self.results.pop(key)
+                node._reuse_outputs(  # pylint: disable=protected-access
+                    copy.deepcopy(self.results[key])
+                )
+            else:
+                outputs = node.evaluate()
+                try:
+                    self.results[key] = copy.deepcopy(outputs)
+                except (TypeError, copy.Error):
+                    log.debug("Can not cache the outputs of %s", node.name)
+                self._drop_least_recently_used_results()
+
+    def _drop_least_recently_used_results(self):
+        """Drop the oldest results until the cache is within max_results."""
+        if self.max_results is None:
+            return
+        while len(self.results) > self.max_results:
+            del self.results[next(iter(self.results))]
 
 
 class ThreadedEvaluator(Evaluator):
@@ -87,62 +131,38 @@ class ThreadedEvaluator(Evaluator):
             nodes (list of INode): The nodes to evaluate
 
         """
-        # create copy to prevent side effects
-        nodes_to_evaluate = list(nodes)
-
-        def node_runner(node):
-            node.evaluate()
-            return node
+        waiting_for, dependents = _dependencies(nodes)
 
+        ready = [node for node in nodes if not waiting_for[node]]
         running_futures = {}
         with futures.ThreadPoolExecutor(max_workers=self.max_workers) as tpe:
-            while nodes_to_evaluate or running_futures:
-                log.debug(
-                    "Iterating thread submission with %s nodes to "
-                    "evaluate and %s running futures",
-                    len(nodes_to_evaluate),
-                    len(running_futures),
-                )
-                # Submit new nodes that are ready to be evaluated
-                not_submitted = []
-                for node in nodes_to_evaluate:
-                    if not any(n.is_dirty for n in node.upstream_nodes):
-                        fut = tpe.submit(node_runner, node)
-                        running_futures[node.name] = fut
-                    else:
-                        not_submitted.append(node)
-                nodes_to_evaluate = not_submitted
-
-                # A deadlock situation:
-                # No nodes running means no nodes can turn clean but nodes on
-                # nodes_to_evaluate not submitted means dirty upstream nodes
-                # and while loop will never terminate
-                if nodes_to_evaluate and not running_futures:
-                    for node in nodes_to_evaluate:  # pragma: no cover
-                        dirty_upstream = [
-                            nn.name
-                            for nn in node.upstream_nodes
-                            if nn.is_dirty
-                        ]
-                        log.debug(
-                            "Node to evaluate: %s\n"
-                            "- Dirty upstream nodes:\n%s",
-                            node.name,
-                            "\n".join(dirty_upstream),
-                        )
-                    raise RuntimeError(
-                        f"Execution hit deadlock: {len(nodes_to_evaluate)} "
-                        "nodes left to evaluate, but no nodes running."
-                    )  # pragma: no cover
-
-                # Wait until a future finishes, then remove all finished nodes
-                # from the relevant lists
-                status = futures.wait(
-                    list(running_futures.values()),
-                    return_when=futures.FIRST_COMPLETED,
-                )
-                for future in status.done:
-                    del running_futures[future.result().name]
+            while ready or running_futures:
+                if len(ready) == 1 and not running_futures:
+                    # Nothing could run in parallel, so evaluate the node in
+                    # this thread instead of handing it to a worker
+                    finished = ready
+                    finished[0].evaluate()
+                else:
+                    for node in ready:
+                        running_futures[tpe.submit(node.evaluate)] = node
+                    log.debug(
+                        "Waiting for %s running futures", len(running_futures)
+                    )
+                    done, _ = futures.wait(
+                        running_futures, return_when=futures.FIRST_COMPLETED
+                    )
+                    finished = []
+                    for future in done:
+                        finished.append(running_futures.pop(future))
+                        future.result()
+
+                # Collect the nodes that no longer wait for any upstream node
+                ready = []
+                for node in finished:
+                    for dependent in dependents[node]:
+                        waiting_for[dependent] -= 1
+                        if not waiting_for[dependent]:
+                            ready.append(dependent)
 
 
 class LegacyMultiprocessingEvaluator(Evaluator):
@@ -152,8 +172,9 @@ class LegacyMultiprocessingEvaluator(Evaluator):
         """Initialize with the graph and the delay between launching nodes.
 
         Args:
-            submission_delay (float): The delay in seconds between loops
-                issuing new threads/processes if nodes are ready to process.
+            submission_delay (float): The maximum delay in seconds between
+                loops issuing new processes. The loop continues as soon as a
+                running process sends its results or ends.
 
         """
         self.submission_delay = submission_delay
@@ -161,81 +182,275 @@ class LegacyMultiprocessingEvaluator(Evaluator):
     def _evaluate_nodes(self, nodes):
         # create copy to prevent side effects
         nodes_to_evaluate = list(nodes)
-        manager = Manager()
-        nodes_data = manager.dict()
         processes = {}
+        receivers = {}
+
+        # The graph does not change during evaluation, so the upstream nodes
+        # only have to be collected once
+        upstream_nodes = {node: node.upstream_nodes for node in nodes}
+
+        # The pickled data of the nodes. A process receives the data of its
+        # node and of the upstream nodes and sends back the evaluated data
+        nodes_data = {}
+
+        # The nodes that have not been evaluated yet, for fast lookups
+        unfinished = set(nodes_to_evaluate)
 
         def upstream_ready(node):
             """Check whether all upstream nodes have been evaluated."""
-            for upstream in node.upstream_nodes:
-                if upstream in nodes_to_evaluate:
-                    return False
-            return True
+            return unfinished.isdisjoint(upstream_nodes[node])
 
-        while nodes_to_evaluate:
+        while unfinished:
             for node in nodes_to_evaluate:
-                process = processes.get(node.name)
-                if process and not process.is_alive():
-                    # If the node is done computing, drop it from the list
-                    nodes_to_evaluate.remove(node)
-                    _update_node(node, nodes_data[node.identifier])
+                process = processes.get(node)
+                receiver = receivers.get(node)
+                if process and (receiver.poll() or not process.is_alive()):
+                    # If the node is done computing, mark it as finished.
+                    # The results are received before the process ends, as
+                    # sending large results blocks until they are received.
+                    # A process that failed keeps the data it was sent.
+                    unfinished.discard(node)
+                    if receiver.poll():
+                        try:
+                            nodes_data[node.identifier] = receiver.recv_bytes()
+                        except EOFError:
+                            # The process ended without sending any results
+                            pass
+                    receiver.close()
+                    process.join()
+                    _update_node(
+                        node, pickle.loads(nodes_data[node.identifier])
+                    )
                     continue
-                if node.name not in processes and upstream_ready(node):
+                if process is None and upstream_ready(node):
                     # If all deps are ready and no thread is active, create one
-                    try:
-                        nodes_data[node.identifier] = node.to_json()
-                    except PicklingError as exc:
-                        raise FlowpipeMultiprocessingError(
-                            "Error pickling/unpickling node.\n"
-                            "This is most likely due to input values that can not "
-                            "be pickled/unpickled properly.\n"
-                            "If any of your input plugs contain flowpipe graphs, "
-                            "that in turn are made up of Nodes created with the "
-                            "@Node decorator, please consider reworking your Nodes. "
-                            "You can either switch to class based nodes by "
-                            "subclassing from Node or invoke the FunctionNode "
-                            "explicitly instead. Refer to: https://github.com/PaulSchweizer/flowpipe/issues/168#issuecomment-1767779623 "  # pylint: disable=line-too-long
-                            "for details."
-                        ) from exc
-                    processes[node.name] = Process(
+                    nodes_data[node.identifier] = _pickle_node(node)
+                    receiver, sender = Pipe(duplex=False)
+                    processes[node] = Process(
                         target=_evaluate_node_in_process,
                         name=f"flowpipe.{node.graph.name}.{node.name}",
-                        args=(node.identifier, nodes_data),
+                        args=(
+                            nodes_data[node.identifier],
+                            _upstream_data(node, nodes_data),
+                            sender,
+                        ),
                     )
-                    processes[node.name].daemon = True
-                    processes[node.name].start()
+                    processes[node].daemon = True
+                    processes[node].start()
+                    sender.close()
+                    receivers[node] = receiver
+
+            # Drop the finished nodes, they are not looked at again
+            nodes_to_evaluate = [
+                n for n in nodes_to_evaluate if n in unfinished
+            ]
+
+            # Nothing changes until a running process sends its results or
+            # ends, so wait for that instead of polling in fixed intervals
+            running = [n for n in nodes_to_evaluate if n in processes]
+            if running:
+                connection.wait(
+                    [receivers[n] for n in running]
+                    + [processes[n].sentinel for n in running],
+                    timeout=self.submission_delay,
+                )
+
+
+class MultiprocessingEvaluator(Evaluator):
+    """Evaluate nodes in a pool of processes."""
+
+    def __init__(self, max_workers=None):
+        """Initialize with how many processes to use.
+
+        Args:
+            max_workers (int): The number of processes to use in parallel,
+                defaults to the futures.ProcessPoolExecutor default.
+
+        """
+        self.max_workers = max_workers
 
-            time.sleep(self.submission_delay)
+    def _evaluate_nodes(self, nodes):
+        """Evaluate the nodes in a pool of processes.
+
+        The processes are started once and evaluate all nodes, each node is
+        submitted as soon as its upstream nodes have been evaluated.
 
+        Args:
+            nodes (list of INode): The nodes to evaluate
 
-def _evaluate_node_in_process(identifier, nodes_data):
+        """
+        waiting_for, dependents = _dependencies(nodes)
+
+        # The pickled data of the nodes, see LegacyMultiprocessingEvaluator
+        nodes_data = {}
+        running_futures = {}
+
+        def submit(node, executor):
+            nodes_data[node.identifier] = _pickle_node(node)
+            future = executor.submit(
+                _evaluate_pickled_node,
+                nodes_data[node.identifier],
+                _upstream_data(node, nodes_data),
+            )
+            running_futures[future] = node
+
+        with futures.ProcessPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            for node in nodes:
+                if not waiting_for[node]:
+                    submit(node, executor)
+
+            while running_futures:
+                done, _ = futures.wait(
+                    running_futures, return_when=futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    node = running_futures.pop(future)
+                    nodes_data[node.identifier] = future.result()
+                    _update_node(
+                        node, pickle.loads(nodes_data[node.identifier])
+                    )
+                    for dependent in dependents[node]:
+                        waiting_for[dependent] -= 1
+                        if not waiting_for[dependent]:
+                            submit(dependent, executor)
+
+
+def _dependencies(nodes):
+    """Count the upstream nodes each node waits for during evaluation.
+
+    Args:
+        nodes (list of INode): The nodes to evaluate
+
+    Returns:
+        (dict, dict): The number of upstream nodes each node waits for and
+            the nodes waiting for each node.
+    """
+    waiting_for = {}
+    dependents = {node: [] for node in nodes}
+    for node in nodes:
+        upstream_nodes = [n for n in node.upstream_nodes if n in dependents]
+        waiting_for[node] = len(upstream_nodes)
+        for upstream_node in upstream_nodes:
+            dependents[upstream_node].append(node)
+    return waiting_for, dependents
+
+
+def _upstream_data(node, nodes_data):
+    """The pickled data of the nodes connected to the inputs of the node.
+
+    Args:
+        node (INode): The node about to be evaluated
+        nodes_data (dict): The pickled data of the nodes by identifier, the
+            data of upstream nodes that are not evaluated is added with their
+            current values
+    """
+    data = {}
+    for upstream in node.parents:
+        if upstream.identifier not in nodes_data:
+            nodes_data[upstream.identifier] = _pickle_node(upstream)
+        data[upstream.identifier] = nodes_data[upstream.identifier]
+    return data
+
+
+def _inputs_key(node):
+    """Key the results of the node by the hash of its pickled input values.
+
+    The values are pickled rather than serialized to json, so that values of
+    different types, like tuples and lists, do not share a key.
+
+    Returns:
+        (tuple): The identifier of the node and the hash of the input values
+            or None if the input values can not be pickled.
+    """
+    try:
+        data = pickle.dumps(
+            {name: plug.value for name, plug in node.inputs.items()},
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    except (PicklingError, TypeError, AttributeError):
+        return None
+    return (node.identifier, hashlib.sha256(data).hexdigest())
+
+
+def _pickle_node(node):
+    """Pickle the serialized node to send it to another process."""
+    try:
+        return pickle.dumps(node.to_json(), protocol=pickle.HIGHEST_PROTOCOL)
+    except PicklingError as exc:
+        raise FlowpipeMultiprocessingError(
+            "Error pickling/unpickling node.\n"
+            "This is most likely due to input values that can not "
+            "be pickled/unpickled properly.\n"
+            "If any of your input plugs contain flowpipe graphs, "
+            "that in turn are made up of Nodes created with the "
+            "@Node decorator, please consider reworking your Nodes. "
+            "You can either switch to class based nodes by "
+            "subclassing from Node or invoke the FunctionNode "
+            "explicitly instead. Refer to: https://github.com/PaulSchweizer/flowpipe/issues/168#issuecomment-1767779623 "  # pylint: disable=line-too-long
+            "for details."
+        ) from exc
+
+
+def _evaluate_node_in_process(node_data, upstream_data, sender):
+    """Evaluate a node in a process started for it.
+
+    Args:
+        node_data (bytes): The pickled data of the node to evaluate
+        upstream_data (dict): The pickled data of the nodes connected to the
+            inputs by their identifiers
+        sender (multiprocessing.connection.Connection): Receives the
+            pickled data of the evaluated node
+    """
+    sender.send_bytes(_evaluate_pickled_node(node_data, upstream_data))
+    sender.close()
+
+
+def _evaluate_pickled_node(node_data, upstream_data):
     """Evaluate a node when multiprocessing.
 
-    1. Deserializing the node from the given nodes_data dict
-    2. Retrieving upstream data from the nodes_data dict
+    1. Deserializing the node from the given node_data
+    2. Retrieving upstream data from the given upstream_data dict
     3. Evaluating the node
-    4. Serializing the results back into the nodes_data
+    4. Serializing the results
 
     Args:
-        identifier (str): The identifier of the node to evaluate
-        nodes_data (dict): Used like a "database" to store the nodes
+        node_data (bytes): The pickled data of the node to evaluate
+        upstream_data (dict): The pickled data of the nodes connected to the
+            inputs by their identifiers
+
+    Returns:
+        (bytes): The pickled data of the evaluated node
     """
     # pylint: disable=import-outside-toplevel, cyclic-import
     from flowpipe.node import INode
 
-    data = nodes_data[identifier]
+    data = pickle.loads(node_data)
     node = INode.from_json(data)
 
+    # Several inputs can be connected to the same upstream node, collate its
+    # outputs only once
+    outputs_by_identifier = {}
+
+    def upstream_outputs(upstream_identifier):
+        """All output plugs of the upstream node, including sub plugs."""
+        if upstream_identifier not in outputs_by_identifier:
+            outputs_by_identifier[upstream_identifier] = INode.from_json(
+                pickle.loads(upstream_data[upstream_identifier])
+            ).all_outputs()
+        return outputs_by_identifier[upstream_identifier]
+
     for name, input_plug in data["inputs"].items():
         for input_identifier, output_plug in input_plug["connections"].items():
-            upstream_node = INode.from_json(nodes_data[input_identifier])
-            node.inputs[name].value = upstream_node.outputs[output_plug].value
+            node.inputs[name].value = upstream_outputs(input_identifier)[
+                output_plug
+            ].value
         for sub_name, sub_plug in input_plug["sub_plugs"].items():
             for sub_id, sub_output in sub_plug["connections"].items():
-                upstream_node = INode.from_json(nodes_data[sub_id])
-                node.inputs[name][
-                    sub_name
-                ].value = upstream_node.all_outputs()[sub_output].value
+                node.inputs[name][sub_name].value = upstream_outputs(sub_id)[
+                    sub_output
+                ].value
 
     node.evaluate()
 
@@ -250,7 +465,7 @@ def _evaluate_node_in_process(identifier, nodes_data):
                 "value"
             ] = sub_plug.value
 
-    nodes_data[identifier] = data
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
 
 
 def _update_node(node, data):
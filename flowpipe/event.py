@@ -14,6 +14,9 @@ class Event:
     Please note that the integrity of the listeners is not enforced or checked.
     """
 
+    # Every node holds several events, slots keep them small
+    __slots__ = ("name", "_listeners")
+
     def __init__(self, name):
         """Initialize the list of listeners
 
@@ -23,6 +26,15 @@ class Event:
         self.name = name
         self._listeners = []
 
+    def __getstate__(self):
+        """The state of the event as a dict, like before it used slots."""
+        return {"name": self.name, "_listeners": self._listeners}
+
+    def __setstate__(self, state):
+        """Restore the event from its state dict."""
+        self.name = state["name"]
+        self._listeners = state["_listeners"]
+
     def emit(self, *args, **kwargs):
         """Call all the listeners with the given args and kwargs."""
         for listener in self._listeners:
@@ -1,9 +1,14 @@
 """A Graph of Nodes."""
 from __future__ import absolute_import, print_function
 
+import functools
+import itertools
+import json
 import logging
 import pickle
 import warnings
+from collections import defaultdict, deque
+from operator import attrgetter
 
 from ascii_canvas import canvas, item
 
@@ -18,16 +23,143 @@ from .utilities import deserialize_graph
 
 log = logging.getLogger(__name__)
 
+# Map mode keywords to evaluators and the keyword arguments they take
+_EVAL_MODES = {
+    "linear": (LinearEvaluator, ("results",)),
+    "threading": (ThreadedEvaluator, ("max_workers",)),
+    "multiprocessing": (
+        LegacyMultiprocessingEvaluator,
+        ("submission_delay",),
+    ),
+}
+
+
+def _marking_modified(method):
+    """Wrap the list method to mark the list as modified when called.
+
+    The nodes of a graph are part of the topology of all connected graphs,
+    so the cached topology is invalidated as well.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.modified = True
+        invalidate_topology()
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class _NodeList(list):
+    """The list of nodes of a graph, marked as modified on every change.
+
+    The graph keeps an index of its nodes up to date when nodes are added
+    through the graph. Changing the list directly marks it as modified, so
+    the graph knows to rebuild the index.
+    """
+
+    def __init__(self, nodes=()):
+        """Initialize the list as modified, there is no index for it yet."""
+        super().__init__(nodes)
+        self.modified = True
+
+    append = _marking_modified(list.append)
+    extend = _marking_modified(list.extend)
+    insert = _marking_modified(list.insert)
+    remove = _marking_modified(list.remove)
+    pop = _marking_modified(list.pop)
+    clear = _marking_modified(list.clear)
+    sort = _marking_modified(list.sort)
+    reverse = _marking_modified(list.reverse)
+    __setitem__ = _marking_modified(list.__setitem__)
+    __delitem__ = _marking_modified(list.__delitem__)
+    __iadd__ = _marking_modified(list.__iadd__)
+    __imul__ = _marking_modified(list.__imul__)
+
 
 class Graph:
     """A graph of Nodes."""
 
+    __slots__ = (
+        "name",
+        "_nodes",
+        "inputs",
+        "outputs",
+        "_input_keys",
+        "_output_keys",
+        "_nodes_by_name",
+        "_node_set",
+        "_node_index_token",
+        "_evaluation_results",
+        "_topology_key",
+        "_topology_cache",
+    )
+
+    # Graphs can be connected to each other, so any structural change on any
+    # graph invalidates the cached topology of all graphs and nodes. A new
+    # token is created for every change, so a token that was pickled or
+    # copied along with a cache never matches the current one
+    _topology_token = object()
+
+    # A node can be on several graphs, so renaming any node invalidates the
+    # node index and the cached topology of all graphs, see
+    # invalidate_node_names
+    _node_names_token = object()
+
+    # Attributes that are only valid in this process and are not pickled
+    _TRANSIENT_ATTRIBUTES = (
+        "_nodes_by_name",
+        "_node_set",
+        "_node_index_token",
+        "_evaluation_results",
+        "_topology_key",
+        "_topology_cache",
+    )
+
     def __init__(self, name=None, nodes=None):
         """Initialize the list of Nodes, inputs and outpus."""
         self.name = name or self.__class__.__name__
         self.nodes = nodes or []
         self.inputs = {}
         self.outputs = {}
+        # Reverse lookup of the keys under which plugs have been promoted
+        self._input_keys = {}
+        self._output_keys = {}
+        self._evaluation_results = {}
+        self._topology_key = None
+        self._topology_cache = {}
+        # Index of the nodes by identity and by name, see _sync_node_index
+        self._nodes_by_name = {}
+        self._node_set = set()
+        self._node_index_token = None
+
+    def __getstate__(self):
+        """The state of the Graph, without the cached topology and results."""
+        state = dict(getattr(self, "__dict__", {}))
+        for attribute in Graph.__slots__:
+            if attribute not in Graph._TRANSIENT_ATTRIBUTES and hasattr(
+                self, attribute
+            ):
+                state[attribute] = getattr(self, attribute)
+        state["nodes"] = list(state.pop("_nodes"))
+        return state
+
+    def __setstate__(self, state):
+        """Drop the cached topology, it is only valid in this process."""
+        for attribute, value in state.items():
+            setattr(self, attribute, value)
+        self._evaluation_results = {}
+        self._topology_key = None
+        self._topology_cache = {}
+        self._nodes_by_name = {}
+        self._node_set = set()
+        self._node_index_token = None
+        if not hasattr(self, "_input_keys"):
+            self._input_keys = {plug: key for key, plug in self.inputs.items()}
+        if not hasattr(self, "_output_keys"):
+            self._output_keys = {
+                plug: key for key, plug in self.outputs.items()
+            }
 
     def __unicode__(self):
         """Display the Graph."""
@@ -35,20 +167,19 @@ class Graph:
 
     def __str__(self):
         """Show all input and output Plugs."""
-        return self.__unicode__().encode("utf-8").decode()
+        return self.node_repr()
 
     def __getitem__(self, key):
         """Grant access to Nodes via their name."""
-        for node in self.nodes:
-            if node.name == key:
-                return node
+        node = self._find_node(key)
         # Search through subgraphs if no node found on graph itself
-        if "." in key:
-            subgraph_name = key.split(".")[0]
-            node_name = key.split(".")[-1]
-            for node in self.all_nodes:
-                if node.name == node_name and node.graph.name == subgraph_name:
-                    return node
+        if node is None and "." in key:
+            subgraph = self.subgraphs.get(key.split(".")[0])
+            if subgraph is not None:
+                # pylint: disable=protected-access
+                node = subgraph._find_node(key.split(".")[-1])
+        if node is not None:
+            return node
 
         raise KeyError(
             f"Graph does not contain a Node named '{key}'. "
@@ -57,6 +188,48 @@ class Graph:
             "e.g. 'sub.node'"
         )
 
+    @property
+    def nodes(self):
+        """The nodes on this graph.
+
+        Use add_node and delete_node to change the nodes. The list can be
+        changed directly, but every direct change requires the index of
+        the nodes to be rebuilt.
+        """
+        return self._nodes
+
+    @nodes.setter
+    def nodes(self, nodes):
+        """Replace the nodes on this graph with the given nodes."""
+        self._nodes = _NodeList(nodes)
+        invalidate_topology()
+
+    def _sync_node_index(self):
+        """Rebuild the index of the nodes if it is out of date.
+
+        add_node keeps the index up to date. It is rebuilt after the nodes
+        list was changed directly or after any node was renamed.
+        """
+        if (
+            self._nodes.modified
+            or self._node_index_token is not Graph._node_names_token
+        ):
+            self._node_set = set(self._nodes)
+            self._nodes_by_name = {}
+            for node in self._nodes:
+                self._nodes_by_name.setdefault(node.name, node)
+            self._nodes.modified = False
+            self._node_index_token = Graph._node_names_token
+
+    def _find_node(self, name):
+        """Find the node of the given name on this graph in the node index.
+
+        Returns:
+            (INode): The node or None if no node of that name exists.
+        """
+        self._sync_node_index()
+        return self._nodes_by_name.get(name)
+
     @property
     def all_nodes(self):
         """Expand the graph with all its subgraphs into a flat list of nodes.
@@ -67,27 +240,65 @@ class Graph:
         Returns:
             (list of INode): All nodes, including the nodes from subgraphs
         """
-        nodes = list(self.nodes)
-        for subgraph in self.subgraphs.values():
-            nodes += subgraph.nodes
-        return list(set(nodes))
+        return list(self._cached("topology", self._collect_topology)[1])
 
     @property
     def subgraphs(self):
         """All other graphs that the nodes of this graph are connected to.
 
+        Only the connected graphs are cached, the names are looked up on
+        every access as graphs can be renamed.
+
         Returns:
             A dict in the form of ``{graph.name: graph}``
         """
-        subgraphs = {}
+        graphs = self._cached("topology", self._collect_topology)[0]
+        return {graph.name: graph for graph in graphs}
+
+    def _sorted_subgraphs(self):
+        """The subgraphs sorted by their name."""
+        return sorted(self.subgraphs.values(), key=attrgetter("name"))
+
+    def _collect_topology(self):
+        """Collect the subgraphs and all nodes in a single traversal.
+
+        Returns:
+            (tuple): The connected graphs and all nodes, see subgraphs and
+                all_nodes
+        """
+        # Most graphs are not connected to other graphs, which can be told
+        # from the direct relatives alone
+        if all(
+            other.graph is self
+            for node in self.nodes
+            for other in itertools.chain(node.parents, node.children)
+        ):
+            return [], list(dict.fromkeys(self.nodes))
+
+        # The downstream nodes of a node that is itself downstream of another
+        # node have already been collected, same for the upstream nodes
+        downstream_nodes = {}
+        upstream_nodes = {}
         for node in self.nodes:
-            for downstream in node.downstream_nodes:
-                if downstream.graph is not self:
-                    subgraphs[downstream.graph.name] = downstream.graph
-            for upstream in node.upstream_nodes:
-                if upstream.graph is not self:
-                    subgraphs[upstream.graph.name] = upstream.graph
-        return subgraphs
+            if node not in downstream_nodes:
+                downstream_nodes.update(dict.fromkeys(node.downstream_nodes))
+            if node not in upstream_nodes:
+                upstream_nodes.update(dict.fromkeys(node.upstream_nodes))
+
+        graphs = []
+        seen = {id(self)}
+        for other in itertools.chain(downstream_nodes, upstream_nodes):
+            graph = other.graph
+            if id(graph) in seen:
+                continue
+            seen.add(id(graph))
+            graphs.append(graph)
+
+        all_nodes = dict.fromkeys(self.nodes)
+        subgraphs = {graph.name: graph for graph in graphs}
+        for subgraph in subgraphs.values():
+            all_nodes.update(dict.fromkeys(subgraph.nodes))
+        return graphs, list(all_nodes)
 
     @property
     def evaluation_matrix(self):
@@ -98,34 +309,50 @@ class Graph:
         they are independent of each other.
         The amount of Nodes in each row can vary.
 
+        The matrix is cached until the structure of the graph changes or any
+        node is renamed, as the rows are sorted by the node names.
+
         Returns:
             (list of list of INode): Each sub list represents a row.
         """
-        # Inspired by Kahn's algorithm
-        nodes_to_sort = set(self.all_nodes)
-        matrix = []
-
-        # cache since this is called often
-        parents = {node: node.parents for node in nodes_to_sort}
-
-        sorted_nodes = set()
-        next_level = {node for node in nodes_to_sort if not parents[node]}
-
-        while next_level:
-            matrix.append(next_level)
-            sorted_nodes |= next_level
-
-            next_level = set()
-            # The next level are all unsorted children of the latest sorted
-            # nodes that don't have any unsorted parents
-            for node in matrix[-1]:
-                for candidate in node.children - sorted_nodes:
-                    if all(
-                        parent in sorted_nodes for parent in parents[candidate]
-                    ):
-                        next_level.add(candidate)
-
-        return [sorted(level, key=lambda node: node.name) for level in matrix]
+        matrix = self._cached(
+            "evaluation_matrix", self._sort_evaluation_matrix
+        )
+        return [list(row) for row in matrix]
+
+    def _sort_evaluation_matrix(self):
+        """Sort the nodes into the evaluation matrix, see evaluation_matrix."""
+        # Kahn's algorithm, a node is ready to be sorted once all its parents
+        # are sorted, its level is one below the lowest of its parents
+        nodes = self.all_nodes
+
+        # Collect the edges once, so that the sort itself only deals with
+        # plain dict lookups and integers
+        in_degree = dict.fromkeys(nodes, 0)
+        children = {}
+        for node in nodes:
+            children[node] = [c for c in node.children if c in in_degree]
+            for child in children[node]:
+                in_degree[child] += 1
+
+        levels = dict.fromkeys(nodes, 0)
+        rows = defaultdict(list)
+        ready = deque(node for node in nodes if not in_degree[node])
+        while ready:
+            node = ready.popleft()
+            rows[levels[node]].append(node)
+            child_level = levels[node] + 1
+            for child in children[node]:
+                if levels[child] < child_level:
+                    levels[child] = child_level
+                in_degree[child] -= 1
+                if not in_degree[child]:
+                    ready.append(child)
+
+        return [
+            sorted(rows[level], key=attrgetter("name"))
+            for level in range(len(rows))
+        ]
 
     @property
     def evaluation_sequence(self):
@@ -135,7 +362,19 @@ class Graph:
             (list of INode): A one dimensional representation of the
                 evaluation matrix.
         """
-        return [node for row in self.evaluation_matrix for node in row]
+        return list(
+            self._cached(
+                "evaluation_sequence", self._flatten_evaluation_matrix
+            )
+        )
+
+    def _flatten_evaluation_matrix(self):
+        """Flatten the cached evaluation matrix into a sequence."""
+        return list(
+            itertools.chain.from_iterable(
+                self._cached("evaluation_matrix", self._sort_evaluation_matrix)
+            )
+        )
 
     @property
     def input_groups(self):
@@ -151,29 +390,53 @@ class Graph:
 
         Nodes on a Graph have to have unique names.
         """
-        if node not in self.nodes:
-            for existing_node in self.nodes:
-                if existing_node.name == node.name:
-                    raise ValueError(
-                        f"Can not add Node of name '{node.name}', a Node with this "
-                        "name already exists on this Graph. Node names on "
-                        "a Graph have to be unique."
-                    )
-            self.nodes.append(node)
+        self._sync_node_index()
+        if node not in self._node_set:
+            if node.name in self._nodes_by_name:
+                raise ValueError(
+                    f"Can not add Node of name '{node.name}', a Node with this "
+                    "name already exists on this Graph. Node names on "
+                    "a Graph have to be unique."
+                )
+            self._nodes.append(node)
+            # The index is updated right here, it does not need a rebuild
+            self._nodes.modified = False
+            self._node_set.add(node)
+            self._nodes_by_name[node.name] = node
             node.graph = self
+            invalidate_topology()
         else:
             log.warning("Node '%s' is already part of this Graph", node.name)
 
     def delete_node(self, node):
         """Disconnect all plugs and then delete the node object."""
-        if node in self.nodes:
-            for plug in node.all_inputs().values():
-                for connection in plug.connections:
-                    plug.disconnect(connection)
-            for plug in node.all_outputs().values():
-                for connection in plug.connections:
-                    plug.disconnect(connection)
-            del self.nodes[self.nodes.index(node)]
+        try:
+            index = self.nodes.index(node)
+        except ValueError:
+            return
+        for plug in node.all_inputs().values():
+            for connection in plug.connections:
+                plug.disconnect(connection)
+        for plug in node.all_outputs().values():
+            for connection in plug.connections:
+                plug.disconnect(connection)
+        del self.nodes[index]
+        invalidate_topology()
+
+    def _cached(self, name, func):
+        """Get the cached result of func until the topology changes.
+
+        Args:
+            name (str): The name to cache the result under
+            func (callable): Computes the result if it is not cached
+        """
+        key = Graph._topology_token
+        if self._topology_key is not key:
+            self._topology_key = key
+            self._topology_cache = {}
+        if name not in self._topology_cache:
+            self._topology_cache[name] = func()
+        return self._topology_cache[name]
 
     def add_plug(self, plug, name=None):
         """Promote the given plug this graph.
@@ -184,23 +447,21 @@ class Graph:
                 the given plug
         """
         if isinstance(plug, InputPlug):
-            if plug not in self.inputs.values():
+            key = self._input_keys.get(plug)
+            if self.inputs.get(key) is not plug:
                 self.inputs[name or plug.name] = plug
+                self._input_keys[plug] = name or plug.name
             else:
-                key = list(self.inputs.keys())[
-                    list(self.inputs.values()).index(plug)
-                ]
                 raise ValueError(
                     f"The given plug '{plug.name}' has already been promoted to this "
                     f"Graph und the key '{key}'"
                 )
         elif isinstance(plug, OutputPlug):
-            if plug not in self.outputs.values():
+            key = self._output_keys.get(plug)
+            if self.outputs.get(key) is not plug:
                 self.outputs[name or plug.name] = plug
+                self._output_keys[plug] = name or plug.name
             else:
-                key = list(self.outputs.keys())[
-                    list(self.outputs.values()).index(plug)
-                ]
                 raise ValueError(
                     f"The given plug {plug.name} has already been promoted to this "
                     f"Graph und the key '{key}'"
@@ -232,15 +493,20 @@ class Graph:
             )
 
         # If that is downstream of this
-        if out_node in in_node.downstream_nodes:
+        # pylint: disable=protected-access
+        if in_node._has_downstream(out_node):
             raise CycleError(
                 "Can't connect OutputPlugs to plugs of an upstream node."
             )
 
-        # Names of subgraphs have to be unique
+        # Names of subgraphs have to be unique, only connections to nodes of
+        # other graphs can add subgraphs
+        if in_node.graph is self:
+            return True
+        subgraphs = self.subgraphs
         if (
-            in_node.graph.name in self.subgraphs
-            and in_node.graph not in self.subgraphs.values()
+            in_node.graph.name in subgraphs
+            and in_node.graph not in subgraphs.values()
         ):
             raise ValueError(
                 f"This node is part of graph '{in_node.graph.name}', but a different "
@@ -259,6 +525,7 @@ class Graph:
         max_workers=None,
         data_persistence=True,
         evaluator=None,
+        memoize=False,
     ):
         """Evaluate all Nodes in the graph.
 
@@ -280,8 +547,8 @@ class Graph:
             skip_clean (bool): Whether to skip nodes that are 'clean' (as
                 tracked by the 'is_dirty' attribute on the node), i.e. whose
                 inputs have not changed since their output was computed
-            submission_delay (float): The delay in seconds between loops
-                issuing new threads/processes if nodes are ready to process.
+            submission_delay (float): The maximum delay in seconds between
+                loops issuing new processes if nodes are ready to process.
             max_workers (int): The maximum number of parallel threads to spawn.
                 None defaults to your pythons ThreadPoolExecutor default.
             data_persistence (bool): If false, the data on plugs that have
@@ -289,47 +556,70 @@ class Graph:
                 reference count of objects.
             evaluator (flowpipe.evaluators.Evaluator): The evaluator to use.
                 For the basic evaluation modes will be picked by 'mode'.
+            memoize (bool): Whether to reuse the outputs of earlier
+                evaluations for nodes whose input values did not change
+                instead of computing them again. Nodes reusing outputs emit
+                the evaluation events, but their compute is not called. Only
+                supported by the linear mode. Copies of the outputs of the
+                128 most recently used node evaluations are kept on the graph
+                until clear_evaluation_results is called.
         """
         log.info('Evaluating Graph "%s"', self.name)
 
-        # map mode keywords to evaluation functions and their arguments
-        eval_modes = {
-            "linear": (LinearEvaluator, {}),
-            "threading": (ThreadedEvaluator, {"max_workers": max_workers}),
-            "multiprocessing": (
-                LegacyMultiprocessingEvaluator,
-                {"submission_delay": submission_delay},
-            ),
-        }
-
         if mode and evaluator:
             raise ValueError("Both 'mode' and 'evaluator' arguments passed.")
+        if memoize and mode != "linear":
+            raise ValueError("Memoization is only supported in 'linear' mode.")
         if mode:
             try:
-                eval_cls, eval_args = eval_modes[mode]
+                eval_cls, arg_names = _EVAL_MODES[mode]
             except KeyError as exc:
                 raise ValueError(f"Unkown mode: {mode}") from exc
-            evaluator = eval_cls(**eval_args)
+            eval_args = {
+                "max_workers": max_workers,
+                "results": self._evaluation_results if memoize else None,
+                "submission_delay": submission_delay,
+            }
+            evaluator = eval_cls(
+                **{name: eval_args[name] for name in arg_names}
+            )
 
         evaluator.evaluate(graph=self, skip_clean=skip_clean)
 
         if not data_persistence:
-            for node in self.nodes:
-                for input_plug in node.all_inputs().values():
-                    if input_plug.connections:
-                        input_plug.value = None
-                for output_plug in node.all_outputs().values():
-                    if output_plug.connections:
-                        output_plug.value = None
+            for plug in self._cached(
+                "connected_plugs", self._collect_connected_plugs
+            ):
+                plug.value = None
+
+    def _collect_connected_plugs(self):
+        """All input and output plugs of the nodes that have connections."""
+        plugs = []
+        for node in self.nodes:
+            for input_plug in node.all_inputs().values():
+                if input_plug.connections:
+                    plugs.append(input_plug)
+            for output_plug in node.all_outputs().values():
+                if output_plug.connections:
+                    plugs.append(output_plug)
+        return plugs
+
+    def clear_evaluation_results(self):
+        """Drop the outputs kept for memoized evaluations."""
+        self._evaluation_results.clear()
 
     def to_pickle(self):
         """Serialize the graph into a pickle."""
-        return pickle.dumps(self)
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
 
     def to_json(self):
         """Serialize the graph into a json."""
         return self._serialize()
 
+    def to_json_stream(self, stream):
+        """Serialize the graph as json into the given writable text stream."""
+        self._serialize_to(stream)
+
     def serialize(self, with_subgraphs=True):  # pragma: no cover
         """Serialize the graph in its grid form.
 
@@ -357,13 +647,47 @@ class Graph:
         data["nodes"] = [node.to_json() for node in self.nodes]
         if with_subgraphs:
             data["subgraphs"] = [
-                graph.serialize(with_subgraphs=False)
-                for graph in sorted(
-                    self.subgraphs.values(), key=lambda g: g.name
+                graph._serialize(  # pylint: disable=protected-access
+                    with_subgraphs=False
                 )
+                for graph in self._sorted_subgraphs()
             ]
         return data
 
+    def _serialize_to(self, stream, with_subgraphs=True):
+        """Serialize the graph as json directly into the given stream.
+
+        The result is equivalent to ``json.dump(graph.to_json(), stream)``,
+        but the nodes are written one by one, so the json representation of
+        the whole graph never has to be held in memory at once.
+
+        Args:
+            stream (file-like): Writable text stream to serialize into
+            with_subgraphs (bool): Set to false to avoid infinite recursion
+        """
+        header = {
+            "module": self.__module__,
+            "cls": self.__class__.__name__,
+            "name": self.name,
+        }
+        stream.write(json.dumps(header)[:-1])
+        stream.write(', "nodes": [')
+        for i, node in enumerate(self.nodes):
+            if i:
+                stream.write(", ")
+            json.dump(node.to_json(), stream)
+        stream.write("]")
+        if with_subgraphs:
+            stream.write(', "subgraphs": [')
+            for i, graph in enumerate(self._sorted_subgraphs()):
+                if i:
+                    stream.write(", ")
+                graph._serialize_to(  # pylint: disable=protected-access
+                    stream, with_subgraphs=False
+                )
+            stream.write("]")
+        stream.write("}")
+
     @staticmethod
     def from_pickle(data):
         """De-serialize from the given pickle data."""
@@ -397,38 +721,37 @@ class Graph:
             for node in row:
                 item_ = item.Item(str(node), [x_pos, y_pos])
                 node.item = item_
-                x_diff = (
-                    item_.bbox[2] - item_.bbox[0] + 4
-                    if item_.bbox[2] - item_.bbox[0] + 4 > x_diff
-                    else x_diff
-                )
-                y_pos += item_.bbox[3] - item_.bbox[1]
+                # The bbox is computed from the text on every access
+                bbox = item_.bbox
+                x_diff = max(x_diff, bbox[2] - bbox[0] + 4)
+                y_pos += bbox[3] - bbox[1]
                 canvas_.add_item(item_)
             x_pos += x_diff
 
         # Include the input groups if any have been set
+        input_groups = self.input_groups
         y_off = 2
-        locked_items = []
-        if self.input_groups:
-            for input_group in self.input_groups.values():
+        locked_items = set()
+        for input_group in input_groups.values():
+            y_off += 1
+            i = item.Item(f"o {input_group.name}", [0, y_off])
+            canvas_.add_item(i)
+            locked_items.add(i)
+            for plug in input_group.plugs:
                 y_off += 1
-                i = item.Item(f"o {input_group.name}", [0, y_off])
+                i = item.Item(
+                    f"`-{plug.node.name}.{plug.name}",
+                    [2, y_off],
+                )
                 canvas_.add_item(i)
-                locked_items.append(i)
-                for plug in input_group.plugs:
-                    y_off += 1
-                    i = item.Item(
-                        f"`-{plug.node.name}.{plug.name}",
-                        [2, y_off],
-                    )
-                    canvas_.add_item(i)
-                    locked_items.append(i)
+                locked_items.add(i)
 
         # Move all items down by Y
+        y_move = y_off + 1 + int(bool(input_groups))
         for i in canvas_.items:
             if i not in locked_items:
                 i.position[0] += 2
-                i.position[1] += y_off + 1 + int(bool(self.input_groups))
+                i.position[1] += y_move
 
         canvas_.add_item(item.Rectangle(x_pos, canvas_.bbox[3] + 1, [0, 0]), 0)
 
@@ -437,26 +760,36 @@ class Graph:
         canvas_.add_item(item.Item(f"{name:^{x_pos}}", [0, 1]), 0)
         canvas_.add_item(item.Rectangle(x_pos, 3, [0, 0]), 0)
 
-        if self.input_groups:
+        if input_groups:
             canvas_.add_item(item.Rectangle(x_pos, y_off + 2, [0, 0]), 0)
 
-        for node in self.all_nodes:
-            for i, plug in enumerate(node.sort_plugs(node.all_outputs())):
-                for connection in node.sort_plugs(node.all_outputs())[
-                    plug
-                ].connections:
+        all_nodes = self.all_nodes
+
+        # The row of each input plug in the drawn node
+        input_rows = {
+            node: {
+                plug: i
+                for i, plug in enumerate(
+                    node.sort_plugs(node.all_inputs()).values()
+                )
+            }
+            for node in all_nodes
+        }
+
+        for node in all_nodes:
+            sorted_outputs = node.sort_plugs(node.all_outputs())
+            # The outputs are drawn on the right, below the inputs
+            x_start = node.item.position[0] + node.item.bbox[2]
+            y_start = node.item.position[1] + 3 + len(input_rows[node])
+            for i, plug in enumerate(sorted_outputs.values()):
+                for connection in plug.connections:
                     dnode = connection.node
-                    start = [
-                        node.item.position[0] + node.item.bbox[2],
-                        node.item.position[1] + 3 + len(node.all_inputs()) + i,
-                    ]
+                    start = [x_start, y_start + i]
                     end = [
                         dnode.item.position[0],
                         dnode.item.position[1]
                         + 3
-                        + list(
-                            dnode.sort_plugs(dnode.all_inputs()).values()
-                        ).index(connection),
+                        + input_rows[dnode][connection],
                     ]
                     canvas_.add_item(item.Line(start, end), 0)
 
@@ -466,10 +799,11 @@ class Graph:
         """List representation of the graph showing Nodes and connections."""
         pretty = []
         pretty.append(self.name)
-        if self.input_groups:
+        input_groups = self.input_groups
+        if input_groups:
             pretty.append("[Input Groups]")
-            for name in sorted(self.input_groups.keys()):
-                input_group = self.input_groups[name]
+            for name in sorted(input_groups):
+                input_group = input_groups[name]
                 pretty.append(f" [g] {name}:")
                 for plug in input_group.plugs:
                     pretty.append(f"  {plug.node.name}.{plug.name}")
@@ -478,6 +812,25 @@ class Graph:
         return "\n ".join(pretty)
 
 
+def invalidate_topology():
+    """Invalidate the cached topology of all graphs and nodes.
+
+    Called when nodes are added or removed, when the nodes list of a graph
+    is changed directly and when plugs are connected or disconnected.
+    """
+    Graph._topology_token = object()  # pylint: disable=protected-access
+
+
+def invalidate_node_names():
+    """Invalidate the node index of all graphs after a node was renamed.
+
+    The evaluation order depends on the node names, so the cached topology
+    is invalidated as well.
+    """
+    Graph._node_names_token = object()  # pylint: disable=protected-access
+    invalidate_topology()
+
+
 default_graph = Graph(name="default")
 
 
@@ -120,12 +120,17 @@ class IPlug:
             for plug_ in plug:
                 self.disconnect(plug_)
             return
+        disconnected = False
         if plug in self.connections:
             self.connections.pop(self.connections.index(plug))
             self.is_dirty = True
+            disconnected = True
         if self in plug.connections:
             plug.connections.pop(plug.connections.index(self))
             plug.is_dirty = True
+            disconnected = True
+        if disconnected:
+            _invalidate_topology()
 
     def promote_to_graph(self, name=None):
         """Add this plug to the graph of this plug's node.
@@ -189,6 +194,7 @@ class OutputPlug(IPlug):
             if self not in plug.connections:
                 plug.connections = [self]
                 plug.is_dirty = True
+            _invalidate_topology()
 
     def __getitem__(self, key):
         """Retrieve a sub plug by key.
@@ -467,3 +473,11 @@ class InputPlugGroup:
         """Set the value for all grouped plugs."""
         for plug in self.plugs:
             plug.value = new_value
+
+
+def _invalidate_topology():
+    """Invalidate the cached topology of all graphs and nodes."""
+    # pylint: disable=import-outside-toplevel, cyclic-import
+    from flowpipe.graph import invalidate_topology
+
+    invalidate_topology()
@@ -1,5 +1,7 @@
 from __future__ import print_function
 
+import pickle
+
 from flowpipe.event import Event
 
 
@@ -46,3 +48,19 @@ def test_event_clear():
 
     assert not event.is_registered(listener)
     assert len(event._listeners) == 0
+
+
+def test_pickle_event():
+    event = Event("test")
+    event.register(print)
+
+    unpickled = pickle.loads(pickle.dumps(event))
+
+    assert unpickled.name == "test"
+    assert unpickled.is_registered(print)
+
+    # Events pickled before they had slots restore from their dict state
+    restored = Event.__new__(Event)
+    restored.__setstate__({"name": "old", "_listeners": [print]})
+    assert restored.name == "old"
+    assert restored.is_registered(print)
@@ -1,5 +1,8 @@
 from __future__ import print_function
 
+import io
+import json
+import threading
 import time
 
 import pytest
@@ -161,6 +164,93 @@ def test_complex_branching_evaluation_sequence(clear_default_graph):
     assert "end" == seq[-1]
 
 
+def test_evaluation_matrix_of_chained_diamonds(clear_default_graph):
+    """Nodes reachable through many paths are only sorted once.
+
+    Each diamond doubles the number of paths from the first to the last node.
+    """
+    graph = Graph()
+    top = NodeForTesting("top0", graph=graph)
+    for i in range(30):
+        left = NodeForTesting(f"left{i}", graph=graph)
+        right = NodeForTesting(f"right{i}", graph=graph)
+        bottom = NodeForTesting(f"top{i + 1}", graph=graph)
+        top.outputs["out"].connect(left.inputs["in1"])
+        top.outputs["out"].connect(right.inputs["in1"])
+        left.outputs["out"].connect(bottom.inputs["in1"])
+        right.outputs["out"].connect(bottom.inputs["in2"])
+        top = bottom
+
+    matrix = graph.evaluation_matrix
+
+    assert len(matrix) == 61
+    for i in range(30):
+        assert [n.name for n in matrix[2 * i]] == [f"top{i}"]
+        assert [n.name for n in matrix[2 * i + 1]] == [f"left{i}", f"right{i}"]
+    assert [n.name for n in matrix[-1]] == ["top30"]
+
+
+def test_evaluation_matrix_is_updated_on_structural_changes(
+    clear_default_graph,
+):
+    graph = Graph()
+    n1 = NodeForTesting("n1", graph=graph)
+    n2 = NodeForTesting("n2", graph=graph)
+    assert graph.evaluation_matrix == [[n1, n2]]
+
+    n1.outputs["out"].connect(n2.inputs["in1"])
+    assert graph.evaluation_matrix == [[n1], [n2]]
+
+    n3 = NodeForTesting("n3", graph=graph)
+    assert graph.evaluation_matrix == [[n1, n3], [n2]]
+
+    n1.outputs["out"].disconnect(n2.inputs["in1"])
+    assert graph.evaluation_matrix == [[n1, n2, n3]]
+
+    graph.delete_node(n3)
+    assert graph.evaluation_matrix == [[n1, n2]]
+
+    graph.nodes.remove(n2)
+    assert graph.evaluation_matrix == [[n1]]
+
+
+def test_evaluation_matrix_is_sorted_by_current_node_names(
+    clear_default_graph,
+):
+    graph = Graph()
+    a = NodeForTesting("a", graph=graph)
+    b = NodeForTesting("b", graph=graph)
+    assert graph.evaluation_sequence == [a, b]
+
+    a.name = "z"
+    assert graph.evaluation_matrix == [[b, a]]
+    assert graph.evaluation_sequence == [b, a]
+
+
+def test_evaluation_sequence_is_cached_until_nodes_are_renamed(
+    clear_default_graph, monkeypatch
+):
+    graph = Graph()
+    a = NodeForTesting("a", graph=graph)
+    b = NodeForTesting("b", graph=graph)
+    sorts = []
+    sort_evaluation_matrix = Graph._sort_evaluation_matrix
+    monkeypatch.setattr(
+        Graph,
+        "_sort_evaluation_matrix",
+        lambda self: sorts.append(self) or sort_evaluation_matrix(self),
+    )
+
+    for _ in range(3):
+        assert graph.evaluation_sequence == [a, b]
+    assert len(sorts) == 1
+
+    a.name = "z"
+    for _ in range(3):
+        assert graph.evaluation_sequence == [b, a]
+    assert len(sorts) == 2
+
+
 def test_serialize_graph_to_json(clear_default_graph, branching_graph):
     serialized = branching_graph.to_json()
     deserialized = Graph.from_json(serialized)
@@ -169,12 +259,49 @@ def test_serialize_graph_to_json(clear_default_graph, branching_graph):
     assert serialized == deserialized.to_json()
 
 
+def test_deserialize_deep_chain_from_json(clear_default_graph):
+    """Deserializing long chains of nodes does not exceed the recursion limit."""
+    graph = Graph()
+    nodes = [NodeForTesting(name=f"n{i}", graph=graph) for i in range(200)]
+    for upstream, downstream in zip(nodes, nodes[1:]):
+        upstream.outputs["out"] >> downstream.inputs["in1"]
+    serialized = graph.to_json()
+
+    deserialized = Graph.from_json(serialized)
+
+    assert deserialized.to_json() == serialized
+    assert deserialized["n199"].upstream_nodes[-1].name == "n0"
+
+
+def test_serialize_graph_to_json_stream(clear_default_graph, branching_graph):
+    stream = io.StringIO()
+    branching_graph.to_json_stream(stream)
+
+    assert json.loads(stream.getvalue()) == branching_graph.to_json()
+
+
 def test_serialize_graph_to_pickle(clear_default_graph, branching_graph):
     serialized = branching_graph.to_pickle()
     deserialized = Graph.from_pickle(serialized)
     assert deserialized.to_json() == branching_graph.to_json()
 
 
+class GraphWithAttributes(Graph):
+    """Subclasses of the Graph can hold additional attributes."""
+
+
+def test_pickle_graph_subclass_with_attributes(clear_default_graph):
+    graph = GraphWithAttributes()
+    graph.metadata = {"key": "value"}
+    NodeForTesting(name="node", graph=graph)
+
+    deserialized = GraphWithAttributes.from_pickle(graph.to_pickle())
+
+    assert deserialized.metadata == {"key": "value"}
+    assert deserialized["node"].name == "node"
+    assert deserialized.evaluation_matrix == [[deserialized["node"]]]
+
+
 def test_string_representations(clear_default_graph, branching_graph):
     """Print the Graph."""
     assert (
@@ -306,6 +433,31 @@ def test_nodes_can_be_deleted(clear_default_graph, branching_graph):
     assert 0 == len(branching_graph.nodes)
 
 
+def test_access_nodes_by_name(clear_default_graph):
+    n1 = NodeForTesting("n1")
+    graph = Graph(nodes=[n1])
+    n2 = NodeForTesting("n2", graph=graph)
+    n3 = NodeForTesting("n3", graph=None)
+    graph.nodes.append(n3)
+
+    assert graph["n1"] is n1
+    assert graph["n2"] is n2
+    assert graph["n3"] is n3
+
+    n2.name = "renamed"
+    assert graph["renamed"] is n2
+    with pytest.raises(KeyError):
+        graph["n2"]
+
+    graph.delete_node(n1)
+    with pytest.raises(KeyError):
+        graph["n1"]
+
+    graph.nodes.remove(n3)
+    with pytest.raises(KeyError):
+        graph["n3"]
+
+
 def test_string_representation_with_inputpluggroups(branching_graph):
     InputPlugGroup(
         "in1",
@@ -472,6 +624,74 @@ def test_node_names_on_graph_have_to_be_unique(clear_default_graph):
         graph.add_node(node_2)
 
 
+def test_node_names_are_unique_with_nodes_added_directly(
+    clear_default_graph,
+):
+    """Nodes put into the nodes list directly are considered as well."""
+    node_1 = NodeForTesting(name="node1", graph=None)
+    graph = Graph(nodes=[node_1])
+    node_2 = NodeForTesting(name="node2", graph=None)
+    graph.nodes.append(node_2)
+
+    with pytest.raises(ValueError):
+        NodeForTesting(name="node1", graph=graph)
+    with pytest.raises(ValueError):
+        NodeForTesting(name="node2", graph=graph)
+
+    graph.nodes.remove(node_2)
+    graph.add_node(NodeForTesting(name="node2", graph=None))
+    assert graph["node2"] is not node_2
+
+
+def test_node_names_are_unique_after_renaming_nodes(clear_default_graph):
+    """A renamed node is known under its new name."""
+    graph = Graph()
+    node = NodeForTesting(name="A", graph=graph)
+    node.name = "B"
+
+    with pytest.raises(ValueError):
+        NodeForTesting(name="B", graph=graph)
+    NodeForTesting(name="A", graph=graph)
+
+    assert sorted(n.name for n in graph.nodes) == ["A", "B"]
+
+
+def test_node_names_are_unique_with_nodes_replaced_directly(
+    clear_default_graph,
+):
+    """Nodes replacing others in the nodes list are considered as well."""
+    graph = Graph()
+    NodeForTesting(name="A", graph=graph)
+    graph.nodes[0] = NodeForTesting(name="C", graph=None)
+
+    with pytest.raises(ValueError):
+        NodeForTesting(name="C", graph=graph)
+    NodeForTesting(name="A", graph=graph)
+
+    assert [n.name for n in graph.nodes] == ["C", "A"]
+
+
+def test_node_names_are_unique_with_nodes_assigned_or_unpickled(
+    clear_default_graph,
+):
+    """Assigned and unpickled nodes lists are indexed as well."""
+    graph = Graph()
+    NodeForTesting(name="A", graph=graph)
+    graph.nodes = [NodeForTesting(name="B", graph=None)]
+
+    with pytest.raises(ValueError):
+        NodeForTesting(name="B", graph=graph)
+    NodeForTesting(name="A", graph=graph)
+
+    graph = Graph.from_pickle(graph.to_pickle())
+    with pytest.raises(ValueError):
+        NodeForTesting(name="A", graph=graph)
+    graph.nodes += [NodeForTesting(name="C", graph=None)]
+    with pytest.raises(ValueError):
+        NodeForTesting(name="C", graph=graph)
+    assert [n.name for n in graph.nodes] == ["B", "A", "C"]
+
+
 def test_nodes_are_only_added_once(clear_default_graph):
     graph = Graph()
     node = NodeForTesting()
@@ -564,6 +784,61 @@ def test_threaded_evaluation():
     assert n3.outputs["result"].value == 3
 
 
+def test_threaded_evaluation_of_omitted_nodes(clear_default_graph):
+    """Nodes downstream of omitted nodes are evaluated as well."""
+    graph = Graph(name="threaded")
+
+    @Node(outputs=["result"])
+    def AddNode(number1, number2):
+        return {"result": number1 + number2}
+
+    n1 = AddNode(name="AddNode1", graph=graph, number1=1, number2=1)
+    n2 = AddNode(name="AddNode2", graph=graph, number2=1)
+    n3 = AddNode(name="AddNode3", graph=graph, number2=1)
+    n1.outputs["result"] >> n2.inputs["number1"]
+    n2.outputs["result"] >> n3.inputs["number1"]
+    n2.outputs["result"].value = 5
+    n2.omit = True
+
+    graph.evaluate(mode="threading")
+
+    assert n2.outputs["result"].value == 5
+    assert n3.outputs["result"].value == 6
+
+
+def test_threaded_evaluation_raises_node_exceptions(clear_default_graph):
+    graph = Graph(name="threaded")
+
+    @Node(outputs=["result"])
+    def FailingNode(number):
+        raise ValueError(number)
+
+    FailingNode(name="FailingNode", graph=graph, number=1)
+
+    with pytest.raises(ValueError):
+        graph.evaluate(mode="threading")
+
+
+def test_threaded_evaluation_of_chain_in_calling_thread(clear_default_graph):
+    """A single ready node is evaluated without handing it to a worker."""
+    graph = Graph(name="threaded")
+    threads = []
+
+    @Node(outputs=["result"])
+    def ThreadNode(number):
+        threads.append(threading.current_thread())
+        return {"result": number + 1}
+
+    n1 = ThreadNode(name="ThreadNode1", graph=graph, number=1)
+    n2 = ThreadNode(name="ThreadNode2", graph=graph)
+    n1.outputs["result"] >> n2.inputs["number"]
+
+    graph.evaluate(mode="threading")
+
+    assert n2.outputs["result"].value == 3
+    assert threads == [threading.current_thread()] * 2
+
+
 def test_valid_evaluation_mode():
     eval_modes = ["linear", "threading", "multiprocessing"]
     for mode in eval_modes:
@@ -632,6 +907,23 @@ def test_cycle_error_when_node_connects_out_to_own_upstream():
         N1.inputs["in_"]["a"] >> N3.outputs["out"]["a"]
 
 
+def test_cycle_error_when_upstream_is_connected_through_sub_plugs():
+    """Cycle Error with the upstream connection going through a sub plug."""
+    graph = Graph()
+    N1 = FunctionNodeForTesting(name="N1", graph=graph)
+    N2 = FunctionNodeForTesting(name="N2", graph=graph)
+    N3 = FunctionNodeForTesting(name="N3", graph=graph)
+
+    N1.outputs["out"]["a"] >> N2.inputs["in_"]
+    N2.outputs["out"] >> N3.inputs["in_"]["a"]
+
+    with pytest.raises(CycleError):
+        N3.outputs["out"] >> N1.inputs["in_"]
+
+    with pytest.raises(CycleError):
+        N2.outputs["out"]["b"] >> N1.inputs["in_"]
+
+
 def test_cycle_error_when_node_connects_out_to_own_upstream_across_subgraphs():
     """Cycle Error:
 
@@ -734,6 +1026,123 @@ def test_passing_evaluator(clear_default_graph, branching_graph):
     assert n3.outputs["result"].value == 3
 
 
+def test_memoized_evaluation_reuses_results(clear_default_graph):
+    """Nodes are only computed again if their input values change."""
+    graph = Graph(name="test_memoized_evaluation")
+    computed = []
+
+    @Node(outputs=["result"])
+    def AddNode(number1, number2):
+        computed.append((number1, number2))
+        return {"result": number1 + number2}
+
+    n1 = AddNode(name="AddNode1", graph=graph, number1=1, number2=1)
+    n2 = AddNode(name="AddNode2", graph=graph, number2=1)
+    n1.outputs["result"] >> n2.inputs["number1"]
+
+    graph.evaluate(memoize=True)
+    n1.inputs["number1"].value = 2
+    graph.evaluate(memoize=True)
+    n1.inputs["number1"].value = 1
+    graph.evaluate(memoize=True)
+
+    assert computed == [(1, 1), (2, 1), (2, 1), (3, 1)]
+    assert n2.outputs["result"].value == 3
+    assert not n1.is_dirty
+    assert not n2.is_dirty
+
+    graph.evaluate()
+    assert len(computed) == 6
+
+
+def test_memoized_evaluation_hands_out_copies(clear_default_graph):
+    """Changing reused outputs in place does not change the cached results."""
+    graph = Graph(name="test_memoized_evaluation")
+    events = []
+
+    @Node(outputs=["result"])
+    def ListNode(number):
+        return {"result": [number]}
+
+    node = ListNode(name="ListNode", graph=graph, number=1)
+    for event in ("evaluation-started", "evaluation-finished"):
+        node.events[event].register(lambda n, e=event: events.append(e))
+
+    graph.evaluate(memoize=True)
+    node.outputs["result"].value.append(99)
+    node.inputs["number"].is_dirty = True
+    graph.evaluate(memoize=True)
+
+    assert node.outputs["result"].value == [1]
+    node.outputs["result"].value.append(99)
+    graph.evaluate(memoize=True)
+    assert node.outputs["result"].value == [1]
+    assert events == ["evaluation-started", "evaluation-finished"] * 3
+    assert "eval_time" in node.stats
+
+
+def test_memoized_evaluation_distinguishes_value_types(clear_default_graph):
+    """Equal values of different types do not share cached results."""
+    graph = Graph(name="test_memoized_evaluation")
+    computed = []
+
+    @Node(outputs=["result"])
+    def TypeNode(value):
+        computed.append(value)
+        return {"result": type(value).__name__}
+
+    node = TypeNode(name="TypeNode", graph=graph, value=(1, 2))
+    graph.evaluate(memoize=True)
+    node.inputs["value"].value = [1, 2]
+    graph.evaluate(memoize=True)
+    node.inputs["value"].value = {1: "a"}
+    graph.evaluate(memoize=True)
+    node.inputs["value"].value = {"1": "a"}
+    graph.evaluate(memoize=True)
+
+    assert computed == [(1, 2), [1, 2], {1: "a"}, {"1": "a"}]
+    assert node.outputs["result"].value == "dict"
+
+
+def test_memoized_evaluation_keeps_recently_used_results(clear_default_graph):
+    """Only the most recently used results are kept and can be cleared."""
+    graph = Graph(name="test_memoized_evaluation")
+    computed = []
+
+    @Node(outputs=["result"])
+    def SquareNode(number):
+        computed.append(number)
+        return {"result": number * number}
+
+    node = SquareNode(name="SquareNode", graph=graph, number=0)
+    evaluator = LinearEvaluator(results={}, max_results=2)
+    for number in (0, 1, 0, 2, 0, 1):
+        node.inputs["number"].value = number
+        evaluator.evaluate(graph)
+
+    assert computed == [0, 1, 2, 1]
+    assert len(evaluator.results) == 2
+
+    graph.evaluate(memoize=True)
+    graph.evaluate(memoize=True)
+    assert computed == [0, 1, 2, 1, 1]
+    graph.clear_evaluation_results()
+    graph.evaluate(memoize=True)
+    assert computed == [0, 1, 2, 1, 1, 1]
+
+
+def test_memoized_evaluation_is_only_supported_in_linear_mode(
+    clear_default_graph, branching_graph
+):
+    for mode in ("threading", "multiprocessing"):
+        with pytest.raises(ValueError):
+            branching_graph.evaluate(mode=mode, memoize=True)
+    with pytest.raises(ValueError):
+        branching_graph.evaluate(
+            mode=None, evaluator=LinearEvaluator(), memoize=True
+        )
+
+
 def test_mode_and_evalutor_are_exclusive(clear_default_graph, branching_graph):
     """Test that passing both mode and evaluator raises an exception."""
     with pytest.raises(ValueError):
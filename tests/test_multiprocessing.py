@@ -1,5 +1,6 @@
 import time
 
+from flowpipe.evaluator import MultiprocessingEvaluator
 from flowpipe.graph import Graph
 from flowpipe.node import Node
 
@@ -133,3 +134,111 @@ def test_multiprocessing_evaluation_updates_the_original_graph():
     assert not n3.is_dirty
     assert not n4.is_dirty
     assert not n5.is_dirty
+
+
+def test_multiprocessing_evaluation_of_dirty_nodes_only():
+    """Clean upstream nodes provide their values to the evaluated nodes."""
+    graph = Graph(name="multiprocessing")
+
+    n1 = AddNode(name="AddNode1", graph=graph, number1=1, number2=1)
+    n2 = AddNode(name="AddNode2", graph=graph, number2=1)
+    n1.outputs["result"] >> n2.inputs["number1"]
+    graph.evaluate()
+
+    n2.inputs["number2"].value = 5
+    graph.evaluate(
+        mode="multiprocessing", skip_clean=True, submission_delay=0.05
+    )
+
+    assert n2.outputs["result"].value == 7
+    assert not n2.is_dirty
+
+
+@Node(outputs=["out"])
+def LargeOutput(size):
+    return {"out": "x" * size}
+
+
+def test_multiprocessing_evaluation_with_large_outputs():
+    """Outputs exceeding the buffer of the process connection arrive."""
+    size = 10 * 1024 * 1024
+    graph = Graph(name="multiprocessing")
+    node = LargeOutput(name="LargeOutput", graph=graph, size=size)
+
+    graph.evaluate(mode="multiprocessing", submission_delay=0.05)
+
+    assert len(node.outputs["out"].value) == size
+
+
+def test_multiprocessing_evaluator_updates_the_original_graph():
+    """The pool based evaluator updates the original graph object."""
+    graph = Graph(name="multiprocessing")
+
+    n1 = AddNode(name="AddNode1", graph=graph, number1=1, number2=1)
+    n2 = AddNode(name="AddNode2", graph=graph, number2=1)
+    n3 = AddNode(name="AddNode3", graph=graph, number2=1)
+    n4 = AddNode(name="AddNode4", graph=graph, number2=1)
+    n5 = AddNode(name="AddNode5", graph=graph, number1=1, number2=1)
+
+    n1.outputs["result"] >> n2.inputs["number1"]
+    n1.outputs["result"] >> n3.inputs["number1"]
+    n1.outputs["result"] >> n4.inputs["number1"]
+    n1.outputs["result"] >> n4.inputs["numbers"]["0"]
+    n1.outputs["result"] >> n4.inputs["numbers"]["1"]
+    n4.outputs["results"]["0"] >> n5.inputs["numbers"]["0"]
+    n4.outputs["results"]["1"] >> n5.inputs["numbers"]["1"]
+
+    graph.evaluate(mode=None, evaluator=MultiprocessingEvaluator())
+
+    assert n2.outputs["result"].value == 3
+    assert n3.outputs["result"].value == 3
+    assert n4.outputs["results"].value == {"0": 0, "1": 1}
+    assert n5.outputs["results"].value == {"0": 0, "1": 1}
+    assert not any(n.is_dirty for n in graph.nodes)
+
+    n2.inputs["number2"].value = 5
+    graph.evaluate(
+        mode=None,
+        evaluator=MultiprocessingEvaluator(max_workers=2),
+        skip_clean=True,
+    )
+
+    assert n2.outputs["result"].value == 7
+    assert not n2.is_dirty
+
+
+def test_multiprocessing_evaluation_does_not_wait_for_submission_delay():
+    """Finished processes release their downstream nodes right away."""
+    graph = Graph(name="multiprocessing")
+
+    n1 = AddNode(name="AddNode1", graph=graph, number1=1, number2=1)
+    n2 = AddNode(name="AddNode2", graph=graph, number2=1)
+    n3 = AddNode(name="AddNode3", graph=graph, number2=1)
+    n1.outputs["result"] >> n2.inputs["number1"]
+    n2.outputs["result"] >> n3.inputs["number1"]
+
+    start = time.time()
+    graph.evaluate(mode="multiprocessing", submission_delay=SLEEP_TIME)
+    runtime = time.time() - start
+
+    assert n3.outputs["result"].value == 4
+    assert runtime < SLEEP_TIME
+
+
+@Node(outputs=["out"])
+def FailingNode(in1):
+    raise ValueError(in1)
+
+
+def test_multiprocessing_evaluation_with_failing_node():
+    """A node failing in its process keeps the data it was sent."""
+    graph = Graph(name="multiprocessing")
+    n1 = FailingNode(name="FailingNode", graph=graph, in1=1)
+    n2 = AddNode(name="AddNode", graph=graph, number1=1, number2=1)
+    n1.outputs["out"].value = 5
+    n1.outputs["out"] >> n2.inputs["number2"]
+
+    graph.evaluate(mode="multiprocessing", submission_delay=0.05)
+
+    assert n1.outputs["out"].value == 5
+    assert n2.outputs["result"].value == 6
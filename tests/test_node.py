@@ -1,5 +1,9 @@
 from __future__ import print_function
 
+import inspect
+import sys
+import uuid
+
 import mock
 import pytest
 
@@ -108,6 +112,44 @@ def test_downstream_upstream_nodes_children_parents(clear_default_graph):
     assert node_a not in node_d.parents
 
 
+def test_upstream_downstream_nodes_of_deep_chain(clear_default_graph):
+    """Traversing deep chains of nodes is not limited by the recursion limit."""
+    nodes = [SquareNode(f"Node{i}") for i in range(100)]
+    for upstream, downstream in zip(nodes, nodes[1:]):
+        upstream.outputs["out"] >> downstream.inputs["in1"]
+
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 50)
+    try:
+        downstream_nodes = nodes[0].downstream_nodes
+        upstream_nodes = nodes[-1].upstream_nodes
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+
+    assert downstream_nodes == nodes[1:]
+    assert upstream_nodes == nodes[-2::-1]
+
+
+def test_upstream_downstream_nodes_follow_connection_changes(
+    clear_default_graph,
+):
+    """The cached upstream and downstream nodes reflect new connections."""
+    n1 = SquareNode("n1")
+    n2 = SquareNode("n2")
+    n3 = SquareNode("n3")
+    n1.outputs["out"] >> n2.inputs["in1"]
+    assert n3.upstream_nodes == []
+    assert n1.downstream_nodes == [n2]
+
+    n2.outputs["out"] >> n3.inputs["in1"]
+    assert n3.upstream_nodes == [n2, n1]
+    assert n1.downstream_nodes == [n2, n3]
+
+    n1.outputs["out"].disconnect(n2.inputs["in1"])
+    assert n3.upstream_nodes == [n2]
+    assert n1.downstream_nodes == []
+
+
 def test_evaluate(clear_default_graph):
     """Evaluate the Node will push the new data to it's output."""
     node = SquareNode()
@@ -288,6 +330,16 @@ def test_node_has_unique_identifier(clear_default_graph):
     assert len(ids) == len(set(ids))
 
 
+def test_node_identifier_ends_in_a_random_uuid(clear_default_graph):
+    """The identifier is the name followed by a version 4 UUID."""
+    node = SquareNode(name="Square", graph=None)
+    name, uuid_ = node.identifier.split("-", 1)
+    assert name == "Square"
+    assert str(uuid.UUID(uuid_)) == uuid_
+    assert uuid.UUID(uuid_).version == 4
+    assert uuid.UUID(uuid_).variant == uuid.RFC_4122
+
+
 def test_node_identifier_can_be_set_explicitely(clear_default_graph):
     """The identifier can be set manually."""
     node = SquareNode()
@@ -576,6 +628,16 @@ def test_serialize_node_serialize_to_pickle(clear_default_graph):
     assert rec2.to_json() == node2.to_json()
 
 
+def test_unpickle_node_with_public_name_state(clear_default_graph):
+    """Pickles of nodes that stored the name as 'name' can be loaded."""
+    node = SquareNode(name="Node1", graph=None)
+    state = dict(node.__dict__)
+    state["name"] = state.pop("_name")
+    restored = SquareNode.__new__(SquareNode)
+    restored.__setstate__(state)
+    assert restored.name == "Node1"
+
+
 def test_deserialize_node_does_not_add_to_default_graph(clear_default_graph):
     node1 = SquareNode("Node1")
     node2 = SquareFunctionNode(name="Node2")
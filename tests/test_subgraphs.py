@@ -1,3 +1,6 @@
+import io
+import json
+
 import pytest
 
 from flowpipe import Graph, Node
@@ -53,6 +56,53 @@ def test_nodes_only_contains_levels_of_graph():
     assert len(graph.nodes) == 1
 
 
+def test_all_nodes_contains_nodes_of_subgraphs_in_order():
+    graph = _nested_graph()
+    subgraphs = graph.subgraphs
+
+    assert graph.all_nodes == (
+        graph.nodes
+        + subgraphs["sub0"].nodes
+        + subgraphs["sub1"].nodes
+        + subgraphs["sub2"].nodes
+    )
+
+
+def test_all_nodes_is_updated_when_subgraphs_are_connected():
+    main = Graph("main")
+    main_node = DemoNode(graph=main)
+    assert main.all_nodes == [main_node]
+
+    sub = Graph("sub")
+    sub_node = DemoNode(graph=sub)
+    main_node.outputs["out"].connect(sub_node.inputs["in_"])
+    assert main.all_nodes == [main_node, sub_node]
+
+    main_node.outputs["out"].disconnect(sub_node.inputs["in_"])
+    assert main.all_nodes == [main_node]
+
+
+def test_all_nodes_is_updated_when_subgraph_nodes_are_changed_directly():
+    main = Graph("main")
+    main_node = DemoNode(graph=main)
+    sub = Graph("sub")
+    sub_node = DemoNode(graph=sub)
+    main_node.outputs["out"].connect(sub_node.inputs["in_"])
+    assert main.all_nodes == [main_node, sub_node]
+
+    other_node = DemoNode(name="other", graph=None)
+    sub.nodes.append(other_node)
+    assert main.all_nodes == [main_node, sub_node, other_node]
+    assert [n.name for n in main.evaluation_sequence] == [
+        "DemoNode",
+        "other",
+        "DemoNode",
+    ]
+
+    sub.nodes = [sub_node]
+    assert main.all_nodes == [main_node, sub_node]
+
+
 def test_subgraph_names_need_to_be_unique():
     """
     +--------------------+          +--------------------+
@@ -155,6 +205,15 @@ def test_serialize_nested_graph_to_json():
     assert serialized == deserialized
 
 
+def test_serialize_nested_graph_to_json_stream():
+    graph = _nested_graph()
+
+    stream = io.StringIO()
+    graph.to_json_stream(stream)
+
+    assert json.loads(stream.getvalue()) == graph.to_json()
+
+
 def test_access_node_of_subgraph_by_key():
     main = Graph("main")
     main_node = DemoNode(name="node", graph=main)
@@ -166,3 +225,18 @@ def test_access_node_of_subgraph_by_key():
 
     assert main["node"] == main_node
     assert main["sub.node"] == sub_node
+
+
+def test_subgraphs_are_accessed_by_their_current_name():
+    main = Graph("main")
+    main_node = DemoNode(name="a", graph=main)
+
+    sub = Graph("sub")
+    sub_node = DemoNode(name="b", graph=sub)
+
+    main_node.outputs["out"] >> sub_node.inputs["in_"]
+    assert list(main.subgraphs) == ["sub"]
+
+    sub.name = "renamed"
+    assert list(main.subgraphs) == ["renamed"]
+    assert main["renamed.b"] is sub_node